@@ -4,18 +4,79 @@ Author: Khelan
 Description: Scrapes latest AI and tech news with summaries and sends daily updates via WhatsApp
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
+import aiohttp
 import feedparser
+import lxml.html
 import os
 from twilio.rest import Client
+from twilio.base.exceptions import TwilioRestException
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import time
+import calendar
 import re
+import json
+import hashlib
+from urllib.parse import urlsplit
 from email.utils import parsedate_to_datetime
 
 
 load_dotenv()
 
+# News sources (RSS feeds)
+NEWS_SOURCES = {
+    'TechCrunch AI': 'https://techcrunch.com/category/artificial-intelligence/feed/',
+    'MIT Tech Review': 'https://www.technologyreview.com/feed/',
+    'The Verge AI': 'https://www.theverge.com/rss/ai-artificial-intelligence/index.xml',
+    'VentureBeat AI': 'https://venturebeat.com/category/ai/feed/',
+    'Wired AI': 'https://www.wired.com/feed/category/science/artificial-intelligence/latest/rss',
+}
+
+# Funding & startup sources
+FUNDING_SOURCES = {
+    'TechCrunch Funding': 'https://techcrunch.com/category/startups/feed/',
+    'Crunchbase News': 'https://news.crunchbase.com/feed/',
+}
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+# Summaries are cut to 200 visible chars, so cleaning more than this is wasted work
+_RAW_SUMMARY_LIMIT = 1200
+_BLOCK_TAGS = (
+    'p', 'br', 'div', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'figure', 'figcaption', 'table', 'tr', 'td', 'th',
+)
+
+_FUNDING_KEYWORDS = (
+    'raised', 'raises', 'funding', 'million', 'billion', 'investment',
+    'series', 'seed round', 'venture capital', 'vc', 'invested',
+    'investors', 'valuation', 'round', 'capital', 'fundraise', 'fundraising',
+    'pre-seed', 'angel', 'acquisition', 'acquired', 'ipo'
+)
+# Anchored at word starts only, so inflections like 'investments' or 'IPOs' still match
+_FUNDING_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, _FUNDING_KEYWORDS)) + ')', re.IGNORECASE)
+
+FEED_CACHE_FILE = '.feed_cache.json'
+_FETCH_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# clean_summary reduces summaries to plain text and only entry.link is used,
+# so feedparser's HTML sanitizer and relative-URI rewriting are wasted work
+_PARSE_OPTIONS = {'sanitize_html': False, 'resolve_relative_uris': False}
+
+# WhatsApp messages are capped at ~1600 chars; leave headroom for the part prefix
+_MAX_MESSAGE_LENGTH = 1500
+_DIVIDER = "━" * 30 + "\n"
+
+
+def _canon(url):
+    """Normalize an article URL so syndicated copies compare equal"""
+    parts = urlsplit(url.lower())
+    return parts.netloc + parts.path.rstrip('/')
+
+
 class NewsScraperBot:
     def __init__(self):
         """Initialize the news scraper with API credentials"""
@@ -31,57 +92,197 @@ class NewsScraperBot:
             self.client = None
             print("⚠️  Warning: Twilio credentials not found. WhatsApp messaging disabled.")
 
-        # News sources (RSS feeds)
-        self.news_sources = {
-            'TechCrunch AI': 'https://techcrunch.com/category/artificial-intelligence/feed/',
-            'MIT Tech Review': 'https://www.technologyreview.com/feed/',
-            'The Verge AI': 'https://www.theverge.com/rss/ai-artificial-intelligence/index.xml',
-            'VentureBeat AI': 'https://venturebeat.com/category/ai/feed/',
-            'Wired AI': 'https://www.wired.com/feed/category/science/artificial-intelligence/latest/rss',}
-
-        # Funding & startup sources
-        self.funding_sources = {
-            'TechCrunch Funding': 'https://techcrunch.com/category/startups/feed/',
-            'Crunchbase News': 'https://news.crunchbase.com/feed/',
-        }
+        # Shared module tables; to customize one bot, assign it a new dict rather than mutating these
+        self.news_sources = NEWS_SOURCES
+        self.funding_sources = FUNDING_SOURCES
 
         self.articles = []
         self.funding_news = []
+        # Canonical links and title hashes already collected, kept per stream
+        self._seen_news: set = set()
+        self._seen_funding: set = set()
+        self.feed_cache = self.load_feed_cache()
+        self._cutoff_ts = self._compute_cutoff()
+
+    def reset(self):
+        """Clear per-run state so the same bot (and its Twilio client) can be reused"""
+        self.articles.clear()
+        self.funding_news.clear()
+        self._seen_news.clear()
+        self._seen_funding.clear()
+        self._cutoff_ts = self._compute_cutoff()
+
+    def _html_to_text(self, html):
+        """Extract visible text from an HTML fragment, decoding entities"""
+        try:
+            root = lxml.html.fragment_fromstring(html, create_parent='div')
+            for element in root.xpath('.//script|.//style'):
+                element.drop_tree()
+            # Only block elements separate words; inline tags like <a> and <b> must not
+            for element in root.iter(*_BLOCK_TAGS):
+                element.text = ' ' + (element.text or '')
+                element.tail = ' ' + (element.tail or '')
+            return ''.join(root.itertext())
+        except Exception:
+            return _TAG_RE.sub('', html)
+
+    def _clean_text(self, text):
+        """Strip markup and collapse whitespace"""
+        # Plain-text summaries skip HTML parsing entirely
+        if '<' in text or '&' in text:
+            text = self._html_to_text(text)
+
+        return _WS_RE.sub(' ', text).strip()
 
     def clean_summary(self, text):
         """Clean and truncate summary text"""
         if not text:
             return "No summary available."
 
-        text = re.sub(r'<[^>]+>', '', text)
-
-        text = ' '.join(text.split())
+        cleaned = None
+        if len(text) > _RAW_SUMMARY_LIMIT:
+            head = text[:_RAW_SUMMARY_LIMIT]
+            # Drop a tag left half-open by the cut
+            last_open = head.rfind('<')
+            if last_open > head.rfind('>'):
+                head = head[:last_open]
+            # Cheap tag strips decide which part to parse, so lxml runs once: the head alone
+            # when it already holds a full summary or nothing visible follows the cut,
+            # otherwise (markup-heavy head) the whole text
+            if not _TAG_RE.sub('', text[len(head):]).strip():
+                cleaned = self._clean_text(head)
+            elif len(_WS_RE.sub(' ', _TAG_RE.sub('', head)).strip()) > 200:
+                cleaned = self._clean_text(head)
+                # Script/style text counted by the cheap strip can leave the head short
+                if len(cleaned) <= 200:
+                    cleaned = None
+
+        if cleaned is None:
+            cleaned = self._clean_text(text)
+
+        text = cleaned
+        if not text:
+            return "No summary available."
 
         if len(text) > 200:
             text = text[:197] + "..."
 
         return text
 
+    def _compute_cutoff(self):
+        """Return the UTC timestamp 24 hours before now"""
+        return (datetime.now(timezone.utc) - timedelta(hours=24)).timestamp()
+
+    def _is_recent(self, published_ts, published):
+        """Check an article's UTC epoch against the 24-hour cutoff, re-parsing the string only when no epoch exists"""
+        if published_ts is not None:
+            return published_ts >= self._cutoff_ts
+        return not published or self.is_within_24_hours(published)
+
     def is_within_24_hours(self, published_date):
         """Check if article was published within the last 24 hours"""
+        if not isinstance(published_date, str):
+            return False
         try:
-            if isinstance(published_date, str):
-                article_time = parsedate_to_datetime(published_date)
-            else:
-                return False
+            return parsedate_to_datetime(published_date).timestamp() >= self._cutoff_ts
+        except Exception:
+            return True
 
-            now = datetime.now(article_time.tzinfo)
-            twenty_four_hours_ago = now - timedelta(hours=24)
+    def load_feed_cache(self, filename=FEED_CACHE_FILE):
+        """Load etag/modified validators and last-seen articles per feed"""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-            return article_time >= twenty_four_hours_ago
-        except Exception as e:
+    def save_feed_cache(self, filename=FEED_CACHE_FILE):
+        """Persist the feed cache for the next run"""
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.feed_cache, f)
             return True
+        except Exception as e:
+            print(f"⚠️  Could not save feed cache: {str(e)}")
+            return False
+
+    async def _fetch_feed(self, session, url, source_name):
+        """Conditionally download and parse a single feed, returning None on failure"""
+        cached = self.feed_cache.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('modified'):
+            headers['If-Modified-Since'] = cached['modified']
+
+        try:
+            async with session.get(url, headers=headers, timeout=_FETCH_TIMEOUT) as response:
+                if response.status == 304:
+                    return {'status': 304, 'feed': None, 'etag': cached.get('etag'), 'modified': cached.get('modified')}
+                response.raise_for_status()
+                result = {
+                    'status': response.status,
+                    'etag': response.headers.get('ETag'),
+                    'modified': response.headers.get('Last-Modified'),
+                }
+                body = await response.read()
+
+            # Parse off the event loop so other downloads keep progressing
+            result['feed'] = await asyncio.to_thread(feedparser.parse, body, **_PARSE_OPTIONS)
+            return result
+        except Exception as e:
+            print(f" Error fetching {source_name}: {str(e)}")
+            return None
+
+    async def _fetch_all(self, sources):
+        """Download and parse all {source_name: url} feeds concurrently and return {url: response}"""
+        connector = aiohttp.TCPConnector(limit=8, limit_per_host=2)
+        # Identify as feedparser did; some feeds block default library User-Agents
+        headers = {'User-Agent': feedparser.USER_AGENT}
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            async with asyncio.TaskGroup() as tg:
+                tasks = {
+                    url: tg.create_task(self._fetch_feed(session, url, source_name))
+                    for source_name, url in sources.items()
+                }
+        return {url: task.result() for url, task in tasks.items()}
 
-    def scrape_rss_feed(self, feed_url, source_name, max_articles=5):
+    def _is_duplicate(self, article, seen):
+        """Check if an article was already collected into seen, remembering it if not"""
+        link_key = _canon(article['link'])
+        title_key = hashlib.blake2b(' '.join(article['title'].lower().split()).encode(), digest_size=8).digest()
+        if link_key in seen or title_key in seen:
+            return True
+        seen.add(link_key)
+        seen.add(title_key)
+        return False
+
+    def _add_unique(self, articles, seen):
+        """Return the articles not already in seen"""
+        return [article for article in articles if not self._is_duplicate(article, seen)]
+
+    def _report_feed(self, source_name, articles, summary, skipped=0):
+        """Print a feed's progress in one write rather than one per entry"""
+        lines = [f"  📡 {source_name}\n"]
+        lines.extend(f"    ✓ {article['title'][:60]}...\n" for article in articles)
+        if skipped:
+            lines.append(f"    🔁 Skipped {skipped} duplicate stories\n")
+        lines.append(summary)
+        print(''.join(lines))
+
+    def scrape_rss_feed(self, feed_url, source_name, max_articles=5, response=None):
         """Scrape articles with summaries from RSS feed, only from last 24 hours"""
         try:
-            print(f"  📡 Fetching from {source_name}...")
-            feed = feedparser.parse(feed_url)
+            if response and response['status'] == 304:
+                # Feed unchanged since last run - reuse the cached articles
+                print(f"  📡 {source_name} unchanged, using cached articles...")
+                articles = [
+                    article for article in self.feed_cache[feed_url].get('entries', [])
+                    if self._is_recent(article.get('published_ts'), article['published'])
+                ]
+                return articles[:max_articles]
+
+            feed = response['feed'] if response else feedparser.parse(feed_url, **_PARSE_OPTIONS)
             articles = []
             checked_count = 0
 
@@ -91,38 +292,40 @@ class NewsScraperBot:
 
                 # Get published date
                 published = entry.get('published', entry.get('updated', ''))
+                published_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+                published_ts = calendar.timegm(published_parsed) if published_parsed is not None else None
 
-                # Check if article is from last 24 hours
-                if published and not self.is_within_24_hours(published):
+                # Check if article is from last 24 hours, preferring the date feedparser already decoded
+                if not self._is_recent(published_ts, published):
                     continue
 
                 # Extract summary from various possible fields
-                summary = ""
-                if hasattr(entry, 'summary'):
-                    summary = entry.summary
-                elif hasattr(entry, 'description'):
-                    summary = entry.description
-                elif hasattr(entry, 'content'):
-                    summary = entry.content[0].value if entry.content else ""
+                summary = entry.get('summary') or entry.get('description') or ''
+                if not summary:
+                    content = entry.get('content')
+                    if content:
+                        summary = content[0].get('value', '')
 
                 article = {
                     'title': entry.title,
                     'link': entry.link,
                     'summary': self.clean_summary(summary),
                     'source': source_name,
-                    'published': published
+                    'published': published,
+                    'published_ts': published_ts,
                 }
                 articles.append(article)
-                print(f"    ✓ {entry.title[:60]}...")
 
                 # Stop if we have enough recent articles
                 if len(articles) >= max_articles:
                     break
 
-            if articles:
-                print(f"    📊 Found {len(articles)} articles from last 24 hours")
-            else:
-                print(f"   No articles from last 24 hours")
+            self.feed_cache[feed_url] = {
+                'etag': response['etag'] if response else feed.get('etag'),
+                'modified': response['modified'] if response else feed.get('modified'),
+                'entries': articles,
+            }
+
             return articles
         except Exception as e:
             print(f" Error scraping {source_name}: {str(e)}")
@@ -130,24 +333,27 @@ class NewsScraperBot:
 
     def is_funding_related(self, title, summary):
         """Check if article is about funding/investment"""
-        funding_keywords = [
-            'raised', 'raises', 'funding', 'million', 'billion', 'investment',
-            'series', 'seed round', 'venture capital', 'vc', 'invested',
-            'investors', 'valuation', 'round', 'capital', 'fundraise',
-            'pre-seed', 'angel', 'acquisition', 'acquired', 'ipo'
-        ]
-        text = (title + ' ' + summary).lower()
-        return any(keyword in text for keyword in funding_keywords)
+        return _FUNDING_RE.search(title) is not None or _FUNDING_RE.search(summary) is not None
 
     def scrape_all_sources(self, max_per_source=5):
         """Scrape all configured news sources"""
         print(f"\n🔍 Starting news scrape from {len(self.news_sources)} sources...")
         print("━" * 60)
 
+        responses = asyncio.run(self._fetch_all(self.news_sources))
+
         for source_name, feed_url in self.news_sources.items():
-            articles = self.scrape_rss_feed(feed_url, source_name, max_per_source)
-            self.articles.extend(articles)
-            time.sleep(1)  # Be respectful to servers
+            if responses[feed_url] is None:
+                continue
+            articles = self.scrape_rss_feed(feed_url, source_name, max_per_source, responses[feed_url])
+            # Skip stories already collected from another news source
+            unique = self._add_unique(articles, self._seen_news)
+            self.articles.extend(unique)
+            if unique:
+                summary = f"    📊 Found {len(unique)} articles from last 24 hours"
+            else:
+                summary = "   No articles from last 24 hours"
+            self._report_feed(source_name, unique, summary, len(articles) - len(unique))
 
         print("━" * 60)
         print(f"Successfully scraped {len(self.articles)} articles total\n")
@@ -158,83 +364,94 @@ class NewsScraperBot:
         print(f"\n💰 Starting funding news scrape from {len(self.funding_sources)} sources...")
         print("━" * 60)
 
+        responses = asyncio.run(self._fetch_all(self.funding_sources))
+
         for source_name, feed_url in self.funding_sources.items():
-            articles = self.scrape_rss_feed(feed_url, source_name, max_per_source)
-            # Filter only funding-related articles
-            funding_articles = [
+            if responses[feed_url] is None:
+                continue
+            articles = self.scrape_rss_feed(feed_url, source_name, max_per_source, responses[feed_url])
+            # Filter only funding-related articles, then skip ones another funding source already had
+            related = [
                 article for article in articles
                 if self.is_funding_related(article['title'], article['summary'])
             ]
+            funding_articles = self._add_unique(related, self._seen_funding)
             self.funding_news.extend(funding_articles)
-            print(f"    💵 {len(funding_articles)} funding articles found")
-            time.sleep(1)
+            self._report_feed(
+                source_name, funding_articles,
+                f"    💵 {len(funding_articles)} funding articles found",
+                len(related) - len(funding_articles),
+            )
 
         print("━" * 60)
         print(f"✅ Successfully scraped {len(self.funding_news)} funding announcements\n")
         return self.funding_news
 
-    def format_message(self):
-        """Format articles into a WhatsApp-friendly message with summaries"""
-        if not self.articles:
-            return "No news articles found today."
-
-        today = datetime.now().strftime("%B %d, %Y")
+    def _format_chunks(self, items, initial_header, cont_header, footer=""):
+        """Split numbered article blocks into messages under WhatsApp's size limit"""
         messages = []
-        current_message = f"🤖 *AI & Tech News Daily Update*\n📅 {today}\n"
-        current_message += f"📊 {len(self.articles)} new articles (last 24 hours)\n"
-        current_message += "━" * 30 + "\n\n"
+        parts: list[str] = [initial_header]
+        length = len(initial_header)
 
-        article_count = 0
-
-        for article in self.articles:
-            article_count += 1
-
-            article_text = f"*{article_count}. {article['title']}*\n"
-            article_text += f"📝 {article['summary']}\n\n"
+        for i, article in enumerate(items, 1):
+            article_text = f"*{i}. {article['title']}*\n📝 {article['summary']}\n\n"
 
             # Check if adding this article would exceed WhatsApp's limit (~1600 chars)
-            if len(current_message) + len(article_text) > 1500:
+            if length + len(article_text) > _MAX_MESSAGE_LENGTH:
                 # Finalize current message and start a new one
-                messages.append(current_message)
-                current_message = f"🤖 *AI & Tech News (continued...)*\n\n"
+                messages.append(''.join(parts))
+                parts = [cont_header]
+                length = len(cont_header)
 
-            current_message += article_text
+            parts.append(article_text)
+            length += len(article_text)
 
-        messages.append(current_message)
+        if footer:
+            parts.append(footer)
+        messages.append(''.join(parts))
 
         return messages
 
+    def format_message(self):
+        """Format articles into a WhatsApp-friendly message with summaries"""
+        if not self.articles:
+            return "No news articles found today."
+
+        today = datetime.now().strftime("%B %d, %Y")
+        return self._format_chunks(
+            self.articles,
+            f"🤖 *AI & Tech News Daily Update*\n📅 {today}\n"
+            f"📊 {len(self.articles)} new articles (last 24 hours)\n" + _DIVIDER + "\n",
+            "🤖 *AI & Tech News (continued...)*\n\n",
+        )
+
     def format_funding_message(self):
         """Format funding announcements into a WhatsApp-friendly message"""
         if not self.funding_news:
             return []
 
         today = datetime.now().strftime("%B %d, %Y")
-        messages = []
-        current_message = f"💰 *Startup Funding Roundup*\n📅 {today}\n"
-        current_message += f"📊 {len(self.funding_news)} funding rounds (last 24 hours)\n"
-        current_message += "━" * 30 + "\n\n"
-
-        funding_count = 0
-
-        for article in self.funding_news:
-            funding_count += 1
-
-            article_text = f"*{funding_count}. {article['title']}*\n"
-            article_text += f"📝 {article['summary']}\n\n"
-
-            # Check if adding this article would exceed WhatsApp's limit
-            if len(current_message) + len(article_text) > 1500:
-                messages.append(current_message)
-                current_message = f"💰 *Startup Funding (continued...)*\n\n"
-
-            current_message += article_text
-
-        # Add footer to last message
-        current_message += "━" * 30 + "\n"
-        messages.append(current_message)
-
-        return messages
+        return self._format_chunks(
+            self.funding_news,
+            f"💰 *Startup Funding Roundup*\n📅 {today}\n"
+            f"📊 {len(self.funding_news)} funding rounds (last 24 hours)\n" + _DIVIDER + "\n",
+            "💰 *Startup Funding (continued...)*\n\n",
+            footer=_DIVIDER,
+        )
+
+    def _send_one(self, body, retries=3):
+        """Send a single WhatsApp message, backing off if Twilio rate-limits us"""
+        for attempt in range(retries + 1):
+            try:
+                return self.client.messages.create(
+                    from_=self.twilio_whatsapp_number,
+                    body=body,
+                    to=self.recipient_whatsapp_number
+                )
+            except TwilioRestException as e:
+                if e.status != 429 or attempt == retries:
+                    raise
+                time.sleep(2 ** attempt)
 
     def send_whatsapp_messages(self, messages):
         """Send one or multiple messages via WhatsApp using Twilio"""
@@ -253,17 +470,16 @@ class NewsScraperBot:
         try:
             print(f"📤 Sending {len(messages)} message(s) via WhatsApp...\n")
 
-            for i, message in enumerate(messages, 1):
-                msg = self.client.messages.create(
-                    from_=self.twilio_whatsapp_number,
-                    body=message if len(messages) == 1 else f"(Part {i}/{len(messages)})\n\n{message}",
-                    to=self.recipient_whatsapp_number
-                )
-                print(f"  ✅ Message {i}/{len(messages)} sent - SID: {msg.sid}")
-
-                # Small delay between messages
-                if i < len(messages):
-                    time.sleep(2)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [
+                    executor.submit(
+                        self._send_one,
+                        message if len(messages) == 1 else f"(Part {i}/{len(messages)})\n\n{message}"
+                    )
+                    for i, message in enumerate(messages, 1)
+                ]
+                for i, future in enumerate(futures, 1):
+                    print(f"  ✅ Message {i}/{len(messages)} sent - SID: {future.result().sid}")
 
             print(f"\n🎉 All messages sent successfully to {self.recipient_whatsapp_number}")
             return True
@@ -277,17 +493,19 @@ class NewsScraperBot:
         """Save scraped articles to a text file for archival"""
         try:
             today = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with open(filename, 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*80}\n")
-                f.write(f"News Update - {today}\n")
-                f.write(f"{'='*80}\n\n")
-
-                for i, article in enumerate(self.articles, 1):
-                    f.write(f"{i}. {article['title']}\n")
-                    f.write(f"   Source: {article['source']}\n")
-                    f.write(f"   Summary: {article['summary']}\n")
-                    f.write(f"   URL: {article['link']}\n")
-                    f.write(f"   Published: {article['published']}\n\n")
+            lines: list[str] = [f"\n{'='*80}\nNews Update - {today}\n{'='*80}\n\n"]
+
+            for i, article in enumerate(self.articles, 1):
+                lines.append(
+                    f"{i}. {article['title']}\n"
+                    f"   Source: {article['source']}\n"
+                    f"   Summary: {article['summary']}\n"
+                    f"   URL: {article['link']}\n"
+                    f"   Published: {article['published']}\n\n"
+                )
+
+            with open(filename, 'a', encoding='utf-8', buffering=1 << 16) as f:
+                f.write(''.join(lines))
 
             print(f"💾 Articles archived to {filename}")
             return True
@@ -301,12 +519,14 @@ class NewsScraperBot:
         print("🚀 AI & TECH NEWS SCRAPER BOT")
         print("=" * 60)
         print(f"⏰ Run time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.reset()
 
         # Scrape tech news from all sources
         self.scrape_all_sources(max_per_source=5)
 
         # Scrape funding news
         self.scrape_funding_sources(max_per_source=10)
+        self.save_feed_cache()
 
         # Check if we have any content
         if not self.articles and not self.funding_news: